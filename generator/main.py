@@ -1,21 +1,92 @@
 import asyncio
-import json
+import gzip
+import hashlib
 import logging
-from typing import Any, Dict
-
-from fastapi import FastAPI, HTTPException, Query
+import os
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Tuple
+
+import geopandas as gpd
+import httpx
+import numpy as np
+import orjson
+import shapely
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 
 from src.merge_municipalities import (
+    DEFAULT_CACHE_DIR,
     DEFAULT_POPULATION_YEAR,
     MINIMUM_POPULATION_THRESHOLD,
+    create_http_client,
     run_merge_pipeline,
 )
 
 
 logger = logging.getLogger(__name__)
 
+STREAM_CHUNK_SIZE = 64 * 1024
+GZIP_COMPRESS_LEVEL = 6
+PIPELINE_CACHE_DIR = os.environ.get("PIPELINE_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """Serialized GeoJSON body, its gzip-compressed form and their ETag validators."""
+
+    content: bytes
+    etag: str
+    gzip_content: bytes
+    gzip_etag: str
+
+    @classmethod
+    def from_bytes(cls, content: bytes) -> "CachedPayload":
+        # Compress once per refresh instead of on every request.
+        digest = hashlib.sha1(content).hexdigest()
+        return cls(
+            content=content,
+            etag=f'"{digest}"',
+            gzip_content=gzip.compress(content, compresslevel=GZIP_COMPRESS_LEVEL),
+            gzip_etag=f'"{digest}-gzip"',
+        )
+
+
+def _crs_member(gdf: gpd.GeoDataFrame) -> bytes:
+    """Return the ``"crs"`` member ``gdf.to_json()`` adds for layers outside EPSG:4326, if any."""
+    if gdf.crs is None or gdf.crs.equals("epsg:4326"):
+        return b""
+    authority = gdf.crs.to_authority()
+    if authority is None or authority[0] not in ("EDCS", "EPSG", "OGC", "SI", "UCUM"):
+        return b""
+    name = f"urn:ogc:def:crs:{authority[0]}::{authority[1]}"
+    return b',"crs":' + orjson.dumps({"type": "name", "properties": {"name": name}})
+
+
+def _serialize_layer(gdf: gpd.GeoDataFrame) -> Tuple[CachedPayload, CachedPayload]:
+    """Serialize a layer as a FeatureCollection and as newline-delimited GeoJSON."""
+    # Geometries are encoded by GEOS in one vectorized call; only properties go through orjson.
+    geometries = shapely.to_geojson(np.asarray(gdf.geometry.values))
+    properties = gdf.drop(columns=gdf.geometry.name)
+    columns = list(properties.columns)
+    features = [
+        b'{"id":'
+        + orjson.dumps(str(index))
+        + b',"type":"Feature","properties":'
+        + orjson.dumps(dict(zip(columns, values)), option=orjson.OPT_SERIALIZE_NUMPY)
+        + b',"geometry":'
+        + (geometry.encode("utf-8") if geometry is not None else b"null")
+        + b"}"
+        for index, values, geometry in zip(
+            properties.index, properties.itertuples(index=False, name=None), geometries
+        )
+    ]
+    collection = (
+        b'{"type":"FeatureCollection","features":[' + b",".join(features) + b"]" + _crs_member(gdf) + b"}"
+    )
+    ndjson = b"".join(feature + b"\n" for feature in features)
+    return CachedPayload.from_bytes(collection), CachedPayload.from_bytes(ndjson)
+
 
 class PipelineCache:
     """Caches the most recent pipeline execution to avoid recomputation per request."""
@@ -24,22 +95,30 @@ class PipelineCache:
         self._lock = asyncio.Lock()
         self._threshold = MINIMUM_POPULATION_THRESHOLD
         self._population_year = DEFAULT_POPULATION_YEAR
-        self._original_geojson: Dict[str, Any] | None = None
-        self._merged_geojson: Dict[str, Any] | None = None
+        self._original_geojson: CachedPayload | None = None
+        self._merged_geojson: CachedPayload | None = None
+        self._original_ndjson: CachedPayload | None = None
+        self._merged_ndjson: CachedPayload | None = None
         self._stats: Dict[str, Any] | None = None
+        self._http_client: httpx.AsyncClient | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._stats is not None
+
+    def matches(self, threshold: int | None, population_year: int | None) -> bool:
+        """Tell whether the cached scenario matches the given parameters (None matches anything)."""
+        return (threshold is None or threshold == self._threshold) and (
+            population_year is None or population_year == self._population_year
+        )
+
+    async def refresh(
+        self, threshold: int | None = None, population_year: int | None = None, force: bool = False
+    ) -> None:
+        """Load pipeline results (from disk when available) and update cached payloads.
 
-    async def ensure_data(self, threshold: int, population_year: int) -> None:
-        """Ensure the cache has data for the requested parameters."""
-        if (
-            self._original_geojson is None
-            or self._merged_geojson is None
-            or self._threshold != threshold
-            or self._population_year != population_year
-        ):
-            await self.refresh(threshold=threshold, population_year=population_year)
-
-    async def refresh(self, threshold: int | None = None, population_year: int | None = None) -> None:
-        """Re-run the pipeline and update cached payloads."""
+        ``force`` bypasses the on-disk cache and re-runs the full pipeline.
+        """
         async with self._lock:
             if threshold is None:
                 threshold = self._threshold
@@ -52,25 +131,50 @@ class PipelineCache:
                 population_year,
             )
 
-            original_gdf, merged_gdf, stats = await asyncio.to_thread(
-                run_merge_pipeline, threshold, population_year
+            if self._http_client is None:
+                self._http_client = create_http_client()
+            original_gdf, merged_gdf, stats = await run_merge_pipeline(
+                threshold,
+                population_year,
+                cache_dir=PIPELINE_CACHE_DIR,
+                refresh_cache=force,
+                client=self._http_client,
             )
-            self._original_geojson = json.loads(original_gdf.to_json())
-            self._merged_geojson = json.loads(merged_gdf.to_json())
+            # Serialization and compression are CPU-bound; keep them off the event loop.
+            original_payloads = await asyncio.to_thread(_serialize_layer, original_gdf)
+            merged_payloads = await asyncio.to_thread(_serialize_layer, merged_gdf)
+            self._original_geojson, self._original_ndjson = original_payloads
+            self._merged_geojson, self._merged_ndjson = merged_payloads
             self._stats = stats
             self._threshold = threshold
             self._population_year = population_year
 
-    def get_original_geojson(self) -> Dict[str, Any]:
+    async def aclose(self) -> None:
+        """Close the shared HTTP client used for IBGE requests."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def get_original_geojson(self) -> CachedPayload:
         if self._original_geojson is None:
             raise RuntimeError("Pipeline cache not initialized.")
         return self._original_geojson
 
-    def get_merged_geojson(self) -> Dict[str, Any]:
+    def get_merged_geojson(self) -> CachedPayload:
         if self._merged_geojson is None:
             raise RuntimeError("Pipeline cache not initialized.")
         return self._merged_geojson
 
+    def get_original_ndjson(self) -> CachedPayload:
+        if self._original_ndjson is None:
+            raise RuntimeError("Pipeline cache not initialized.")
+        return self._original_ndjson
+
+    def get_merged_ndjson(self) -> CachedPayload:
+        if self._merged_ndjson is None:
+            raise RuntimeError("Pipeline cache not initialized.")
+        return self._merged_ndjson
+
     def get_stats(self) -> Dict[str, Any]:
         if self._stats is None:
             raise RuntimeError("Pipeline cache not initialized.")
@@ -85,6 +189,7 @@ app = FastAPI(
     title="Municipality Merge Generator",
     description="API que executa o pipeline de fusão de municípios e expõe os GeoJSON resultantes.",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -103,6 +208,11 @@ async def startup() -> None:
     await pipeline_cache.refresh()
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    await pipeline_cache.aclose()
+
+
 def _sanitize_threshold(value: int) -> int:
     if value <= 0:
         raise HTTPException(status_code=400, detail="threshold deve ser um inteiro positivo.")
@@ -115,45 +225,120 @@ def _sanitize_year(value: int) -> int:
     return value
 
 
+def _require_cached(threshold: int | None, population_year: int | None) -> None:
+    """Reject requests that would need a pipeline run; only POST /refresh may trigger one."""
+    if not pipeline_cache.is_ready:
+        raise HTTPException(status_code=503, detail="Pipeline ainda não foi executado.")
+    if threshold is not None:
+        threshold = _sanitize_threshold(threshold)
+    if population_year is not None:
+        population_year = _sanitize_year(population_year)
+    if not pipeline_cache.matches(threshold, population_year):
+        raise HTTPException(
+            status_code=409,
+            detail="Parâmetros diferentes do cenário em cache; use POST /refresh para recalculá-lo.",
+        )
+
+
+def _accepts_gzip(request: Request) -> bool:
+    for token in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = token.partition(";")
+        if coding.strip().lower() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def _negotiate(request: Request, payload: CachedPayload) -> Tuple[bytes, str, Dict[str, str]]:
+    """Pick the gzip or identity representation and return its body, ETag and headers."""
+    if _accepts_gzip(request):
+        return payload.gzip_content, payload.gzip_etag, {"Content-Encoding": "gzip"}
+    return payload.content, payload.etag, {}
+
+
+def _is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+def _payload_response(request: Request, payload: CachedPayload) -> Response:
+    content, etag, encoding_headers = _negotiate(request, payload)
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers={**headers, **encoding_headers})
+
+
+async def _iter_chunks(content: bytes) -> AsyncIterator[memoryview]:
+    # An async generator is consumed on the event loop; a sync one would cost Starlette a
+    # threadpool hop per chunk for a body that is already in memory.
+    view = memoryview(content)
+    for start in range(0, len(view), STREAM_CHUNK_SIZE):
+        yield view[start : start + STREAM_CHUNK_SIZE]
+
+
+def _stream_response(request: Request, payload: CachedPayload) -> Response:
+    content, etag, encoding_headers = _negotiate(request, payload)
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if _is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(
+        _iter_chunks(content), media_type="application/x-ndjson", headers={**headers, **encoding_headers}
+    )
+
+
 @app.get("/status")
-async def status(
-    threshold: int = Query(MINIMUM_POPULATION_THRESHOLD, description="População mínima desejada."),
-    population_year: int = Query(DEFAULT_POPULATION_YEAR, description="Ano da estimativa populacional."),
-) -> Dict[str, Any]:
-    threshold = _sanitize_threshold(threshold)
-    population_year = _sanitize_year(population_year)
-    await pipeline_cache.ensure_data(threshold, population_year)
+async def status() -> Dict[str, Any]:
+    _require_cached(None, None)
     return pipeline_cache.get_stats()
 
 
-@app.get("/geojson/original")
+@app.get("/geojson/original", deprecated=True)
 async def geojson_original(
-    threshold: int = Query(MINIMUM_POPULATION_THRESHOLD),
-    population_year: int = Query(DEFAULT_POPULATION_YEAR),
-) -> JSONResponse:
-    threshold = _sanitize_threshold(threshold)
-    population_year = _sanitize_year(population_year)
-    await pipeline_cache.ensure_data(threshold, population_year)
-    return JSONResponse(pipeline_cache.get_original_geojson())
+    request: Request,
+    threshold: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+    population_year: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+) -> Response:
+    _require_cached(threshold, population_year)
+    return _payload_response(request, pipeline_cache.get_original_geojson())
 
 
-@app.get("/geojson/merged")
+@app.get("/geojson/merged", deprecated=True)
 async def geojson_merged(
-    threshold: int = Query(MINIMUM_POPULATION_THRESHOLD),
-    population_year: int = Query(DEFAULT_POPULATION_YEAR),
-) -> JSONResponse:
-    threshold = _sanitize_threshold(threshold)
-    population_year = _sanitize_year(population_year)
-    await pipeline_cache.ensure_data(threshold, population_year)
-    return JSONResponse(pipeline_cache.get_merged_geojson())
+    request: Request,
+    threshold: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+    population_year: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+) -> Response:
+    _require_cached(threshold, population_year)
+    return _payload_response(request, pipeline_cache.get_merged_geojson())
+
+
+@app.get("/geojson/original.ndjson")
+async def geojson_original_ndjson(
+    request: Request,
+    threshold: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+    population_year: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+) -> Response:
+    _require_cached(threshold, population_year)
+    return _stream_response(request, pipeline_cache.get_original_ndjson())
+
+
+@app.get("/geojson/merged.ndjson")
+async def geojson_merged_ndjson(
+    request: Request,
+    threshold: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+    population_year: int | None = Query(None, description="Opcional; deve coincidir com o cache."),
+) -> Response:
+    _require_cached(threshold, population_year)
+    return _stream_response(request, pipeline_cache.get_merged_ndjson())
 
 
 @app.post("/refresh")
 async def refresh(
     threshold: int = Query(MINIMUM_POPULATION_THRESHOLD, description="População mínima desejada."),
     population_year: int = Query(DEFAULT_POPULATION_YEAR, description="Ano da estimativa populacional."),
+    force: bool = Query(False, description="Ignora o cache em disco e recalcula tudo, inclusive downloads."),
 ) -> Dict[str, Any]:
     threshold = _sanitize_threshold(threshold)
     population_year = _sanitize_year(population_year)
-    await pipeline_cache.refresh(threshold, population_year)
+    await pipeline_cache.refresh(threshold, population_year, force=force)
     return {"detail": "Pipeline recalculado.", **pipeline_cache.get_stats()}
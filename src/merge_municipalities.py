@@ -16,14 +16,27 @@ the underlying libraries in the user cache directory.
 from __future__ import annotations
 
 import argparse
+import asyncio
+import contextlib
+import hashlib
+import heapq
 import logging
 import os
+import shutil
+import tempfile
+from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import Dict, Iterable, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 import geopandas as gpd
-import requests
+import httpx
+import numpy as np
+import orjson
+import shapely
 from geobr import read_municipality
+from numba import njit
+from shapely import coverage_union
+from shapely.errors import GEOSException
 from shapely.geometry.base import BaseGeometry
 from shapely.ops import unary_union
 
@@ -33,6 +46,9 @@ DEFAULT_POPULATION_YEAR = 2021
 MINIMUM_POPULATION_THRESHOLD = 30_000
 CALCULATION_CRS = "EPSG:5880"  # SIRGAS 2000 / Brazil Polyconic (metric distances)
 OUTPUT_CRS = "EPSG:4674"  # SIRGAS 2000 geographic coordinates
+CACHE_SCHEMA_VERSION = 3  # Bump whenever cached artefacts change shape or semantics.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "brazilmunicipalmerge")
+HTTP_TIMEOUT_SECONDS = 120
 
 
 class MergeError(Exception):
@@ -41,48 +57,94 @@ class MergeError(Exception):
 
 @dataclass
 class Region:
-    """Represents a mutable merged region during the aggregation process."""
+    """Represents a mutable merged region during the aggregation process.
 
-    id: str
-    members: Set[str]
+    Regions are identified by the integer position of one of their member municipalities,
+    which is also the union-find root of the cluster; membership is resolved through the
+    union-find links only when the final GeoDataFrame is built.
+    """
+
+    id: int
     population: int
     geometry: BaseGeometry
-    names: List[str]
+    representative_name: str
     states: Set[str]
-    neighbors: Set[str] = field(default_factory=set)
-
-    def centroid_distance_to(self, other: "Region") -> float:
-        return self.geometry.centroid.distance(other.geometry.centroid)
-
-    def merge_with(self, other: "Region", new_id: str) -> "Region":
-        merged_geometry = unary_union([self.geometry, other.geometry]).buffer(0)
+    area: float
+    centroid_x: float
+    centroid_y: float
+    neighbors: Set[int] = field(default_factory=set)
+
+    def merge_with(self, other: "Region", new_id: int, neighbors: Set[int]) -> "Region":
+        """Combine two regions; ``neighbors`` is the merged region's already-computed neighbor set."""
+        try:
+            # Municipal boundaries form a coverage, so GEOS can skip general overlay.
+            merged_geometry = coverage_union(self.geometry, other.geometry)
+        except GEOSException:
+            logging.debug("Coverage union failed for %s and %s; using unary_union", self.id, other.id)
+            # Repair the inputs first: overlay trips over the same invalid rings as coverage_union.
+            parts = shapely.make_valid(
+                [self.geometry, other.geometry], method="structure", keep_collapsed=False
+            )
+            merged_geometry = unary_union(parts)
         merged_population = self.population + other.population
-        merged_members = self.members | other.members
-        merged_names = self.names + other.names
+        representative_name = max(self.representative_name, other.representative_name, key=len)
         merged_states = self.states | other.states
-        merged_neighbors = (self.neighbors | other.neighbors) - {self.id, other.id}
+        merged_area = self.area + other.area
+        if merged_area > 0:
+            # The parts do not overlap, so the union's centroid is their area-weighted mean.
+            centroid_x = (self.centroid_x * self.area + other.centroid_x * other.area) / merged_area
+            centroid_y = (self.centroid_y * self.area + other.centroid_y * other.area) / merged_area
+        else:
+            merged_centroid = merged_geometry.centroid
+            centroid_x, centroid_y = merged_centroid.x, merged_centroid.y
         return Region(
             id=new_id,
-            members=merged_members,
             population=merged_population,
             geometry=merged_geometry,
-            names=merged_names,
+            representative_name=representative_name,
             states=merged_states,
-            neighbors=merged_neighbors,
+            area=merged_area,
+            centroid_x=centroid_x,
+            centroid_y=centroid_y,
+            neighbors=neighbors,
         )
 
 
-def fetch_population(series_year: int) -> Dict[str, int]:
-    """Fetch population estimates for all municipalities for the given year."""
+def create_http_client() -> httpx.AsyncClient:
+    """Create an HTTP/2 client with keep-alive; share it across pipeline runs."""
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_keepalive_connections=10),
+    )
+
+
+async def fetch_population(
+    series_year: int,
+    client: httpx.AsyncClient,
+    previous: Optional[Dict[str, int]] = None,
+    last_modified: Optional[str] = None,
+) -> Tuple[Dict[str, int], Optional[str]]:
+    """Fetch population estimates for all municipalities for the given year.
+
+    Returns the estimates and the response's Last-Modified value. When ``previous`` and its
+    ``last_modified`` value are given the request is conditional, and ``previous`` is returned
+    as is if IBGE answers 304.
+    """
     url = (
         "https://servicodados.ibge.gov.br/api/v3/agregados/"
         f"{POPULATION_AGGREGATE_ID}/periodos/{series_year}/variaveis/"
         f"{POPULATION_VARIABLE_ID}?localidades=N6%5Ball%5D"
     )
+    conditional = previous is not None and last_modified is not None
+    headers = {"If-Modified-Since": last_modified} if conditional else {}
     logging.info("Requesting IBGE population data for %d", series_year)
-    response = requests.get(url, timeout=120)
+    response = await client.get(url, headers=headers)
+    if response.status_code == 304 and conditional:
+        logging.info("IBGE population data for %d not modified; reusing cached data", series_year)
+        return previous, last_modified
     response.raise_for_status()
-    data = response.json()
+    data = orjson.loads(response.content)
 
     try:
         series = data[0]["resultados"][0]["series"]
@@ -101,109 +163,327 @@ def fetch_population(series_year: int) -> Dict[str, int]:
             except ValueError:
                 logging.warning("Ignoring non-numeric population value %s for %s", value, geo_id)
     logging.info("Loaded population data for %d municipalities", len(population))
-    return population
+    return population, response.headers.get("Last-Modified")
+
+
+def repair_geometries(geometries: np.ndarray) -> np.ndarray:
+    """Make invalid polygons valid in one vectorized pass so merges never need buffer(0)."""
+    repaired = np.asarray(geometries, dtype=object).copy()
+    invalid = ~shapely.is_valid(repaired)
+    if invalid.any():
+        logging.info("Repairing %d invalid municipal polygons", int(invalid.sum()))
+        repaired[invalid] = shapely.make_valid(repaired[invalid], method="structure", keep_collapsed=False)
+    return repaired
 
 
-def fetch_geometries() -> gpd.GeoDataFrame:
-    """Download the municipal boundaries and return them in the calculation CRS."""
+def _download_geometries() -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
     logging.info("Downloading municipal geometries via geobr")
     gdf = read_municipality(year=2020, simplified=True)
     selected = gdf[["code_muni", "name_muni", "abbrev_state", "geometry"]].copy()
     selected["code_muni"] = selected["code_muni"].round().astype("int64").astype(str)
-    selected = selected.to_crs(CALCULATION_CRS)
     selected = selected.rename(
         columns={"code_muni": "municipality_id", "name_muni": "municipality_name", "abbrev_state": "state"}
     )
+    # geobr already serves SIRGAS 2000, so this is normally a no-op.
+    geographic = selected.to_crs(OUTPUT_CRS)
+    metric = geographic.to_crs(CALCULATION_CRS)
+    metric["geometry"] = gpd.GeoSeries(
+        repair_geometries(metric.geometry.values), index=metric.index, crs=metric.crs
+    )
     logging.info("Retrieved %d municipal polygons", len(selected))
-    return selected
+    return geographic, metric
+
+
+async def fetch_geometries() -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
+    """Download the municipal boundaries in the output CRS and in the calculation CRS.
+
+    Both frames share the same row order; the metric one is only used for adjacency and merges.
+    """
+    # geobr downloads synchronously, so run it in a thread alongside the population request.
+    return await asyncio.to_thread(_download_geometries)
+
+
+def _cache_key(*parts: object) -> str:
+    raw = ":".join(str(part) for part in (*parts, CACHE_SCHEMA_VERSION))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _write_atomically(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_cached_population(path: str) -> Tuple[Optional[Dict[str, int]], Optional[str]]:
+    """Return the cached estimates and their Last-Modified value, each None when missing."""
+    if not os.path.exists(path):
+        return None, None
+    with open(path, "rb") as handle:
+        population = orjson.loads(handle.read())
+    last_modified_path = f"{path}.last-modified"
+    if not os.path.exists(last_modified_path):
+        return population, None
+    with open(last_modified_path, "r", encoding="utf-8") as handle:
+        return population, handle.read().strip() or None
+
+
+def _store_cached_population(path: str, population: Dict[str, int], last_modified: Optional[str]) -> None:
+    _write_atomically(path, orjson.dumps(population))
+    last_modified_path = f"{path}.last-modified"
+    if last_modified:
+        _write_atomically(last_modified_path, last_modified.encode("utf-8"))
+    else:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(last_modified_path)
+
+
+async def load_population(
+    series_year: int, client: httpx.AsyncClient, cache_dir: Optional[str] = None, refresh: bool = False
+) -> Dict[str, int]:
+    """Return population estimates, reading from and writing to the disk cache when enabled.
+
+    The response's Last-Modified value is stored next to the cached JSON, so a refresh only
+    downloads the estimates again when IBGE reports a change.
+    """
+    if cache_dir is None:
+        population, _ = await fetch_population(series_year, client)
+        return population
+    path = os.path.join(cache_dir, "population", f"{_cache_key(series_year)}.json")
+    cached, last_modified = await asyncio.to_thread(_read_cached_population, path)
+    if cached is not None and not refresh:
+        logging.info("Loading cached population data from %s", path)
+        return cached
+    population, last_modified = await fetch_population(series_year, client, cached, last_modified)
+    await asyncio.to_thread(_store_cached_population, path, population, last_modified)
+    return population
+
+
+def _write_parquet_atomically(gdf: gpd.GeoDataFrame, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        gdf.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception:
+        # pyarrow reports write failures with its own exception types, not only OSError.
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+async def load_geometries(
+    cache_dir: Optional[str] = None, refresh: bool = False
+) -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
+    """Return geographic and metric geometries, using the disk cache when enabled."""
+    if cache_dir is None:
+        return await fetch_geometries()
+    geometries_dir = os.path.join(cache_dir, "geometries", _cache_key("geometries"))
+    geographic_path = os.path.join(geometries_dir, "geographic.parquet")
+    metric_path = os.path.join(geometries_dir, "metric.parquet")
+    if not refresh and os.path.exists(geographic_path) and os.path.exists(metric_path):
+        logging.info("Loading cached municipal geometries from %s", geometries_dir)
+        return (
+            await asyncio.to_thread(gpd.read_parquet, geographic_path),
+            await asyncio.to_thread(gpd.read_parquet, metric_path),
+        )
+    geographic, metric = await fetch_geometries()
+    await asyncio.to_thread(_write_parquet_atomically, geographic, geographic_path)
+    await asyncio.to_thread(_write_parquet_atomically, metric, metric_path)
+    return geographic, metric
 
 
 def build_adjacency(gdf: gpd.GeoDataFrame) -> Dict[str, Set[str]]:
     """Create an adjacency mapping keyed by municipality_id."""
     logging.info("Building adjacency graph")
-    spatial_index = gdf.sindex
-    adjacency: Dict[str, Set[str]] = {row.municipality_id: set() for row in gdf.itertuples()}
-    for row in gdf.itertuples():
-        candidate_idx = list(spatial_index.query(row.geometry, predicate="touches"))
-        for neighbor_pos in candidate_idx:
-            neighbor_row = gdf.iloc[neighbor_pos]
-            if neighbor_row.municipality_id == row.municipality_id:
-                continue
-            adjacency[row.municipality_id].add(neighbor_row.municipality_id)
+    ids = gdf["municipality_id"].to_numpy()
+    # A single bulk STRtree query returns every touching (input, tree) position pair.
+    input_pos, tree_pos = gdf.sindex.query(gdf.geometry, predicate="touches")
+    adjacency: Dict[str, Set[str]] = {municipality_id: set() for municipality_id in ids}
+    for municipality_id, neighbor_id in zip(ids[input_pos], ids[tree_pos]):
+        if municipality_id != neighbor_id:
+            adjacency[municipality_id].add(neighbor_id)
     logging.info("Adjacency graph completed")
     return adjacency
 
 
 def initialize_regions(
     gdf: gpd.GeoDataFrame, population: Dict[str, int], adjacency: Dict[str, Set[str]]
-) -> Dict[str, Region]:
-    regions: Dict[str, Region] = {}
-    for row in gdf.itertuples():
+) -> Dict[int, Region]:
+    """Create one region per municipality, keyed by the municipality's row position."""
+    position_of = {mid: position for position, mid in enumerate(gdf["municipality_id"])}
+    geometries = gdf.geometry.values
+    areas = shapely.area(geometries)
+    centroids = shapely.centroid(geometries)
+    centroid_x = shapely.get_x(centroids)
+    centroid_y = shapely.get_y(centroids)
+    regions: Dict[int, Region] = {}
+    for position, row in enumerate(gdf.itertuples()):
         pop = population.get(row.municipality_id, 0)
         region = Region(
-            id=row.municipality_id,
-            members={row.municipality_id},
+            id=position,
             population=pop,
             geometry=row.geometry,
-            names=[row.municipality_name],
+            representative_name=row.municipality_name,
             states={row.state},
-            neighbors=set(adjacency.get(row.municipality_id, set())),
+            area=float(areas[position]),
+            centroid_x=float(centroid_x[position]),
+            centroid_y=float(centroid_y[position]),
+            neighbors={position_of[nid] for nid in adjacency.get(row.municipality_id, ())},
         )
         regions[region.id] = region
     return regions
 
 
-def pick_closest_neighbor(region: Region, regions: Dict[str, Region]) -> Optional[Region]:
+def find_root(parent: Dict[int, int], node: int) -> int:
+    """Follow union-find links to the root of ``node``, compressing the path on the way."""
+    root = node
+    while root in parent:
+        root = parent[root]
+    while node != root:
+        parent[node], node = root, parent[node]
+    return root
+
+
+@njit(cache=True, fastmath={"nsz", "arcp", "contract", "afn", "reassoc"})
+def _argmin_squared_distance(xs: np.ndarray, ys: np.ndarray, px: float, py: float, mask: np.ndarray) -> int:
+    """Return the masked index closest to (px, py), or -1 when the mask is empty."""
+    best = -1
+    best_distance = np.inf
+    for i in range(xs.size):
+        if mask[i]:
+            # Squared distances preserve the ordering, so the sqrt is skipped.
+            distance = (xs[i] - px) ** 2 + (ys[i] - py) ** 2
+            if distance < best_distance:
+                best_distance = distance
+                best = i
+    return best
+
+
+class CentroidIndex:
+    """Structure-of-arrays copy of live region centroids, indexed by region id."""
+
+    def __init__(self, regions: Dict[int, Region]) -> None:
+        size = max(regions, default=-1) + 1
+        self.x = np.zeros(size, dtype=np.float64)
+        self.y = np.zeros(size, dtype=np.float64)
+        self.alive = np.zeros(size, dtype=np.bool_)
+        for region in regions.values():
+            self.update(region)
+
+    def update(self, region: Region) -> None:
+        self.x[region.id] = region.centroid_x
+        self.y[region.id] = region.centroid_y
+        self.alive[region.id] = True
+
+    def remove(self, region_id: int) -> None:
+        self.alive[region_id] = False
+
+    def closest_among(self, region: Region, candidate_ids: List[int]) -> int:
+        """Return the candidate id whose centroid is nearest to the region's centroid."""
+        ids = np.fromiter(candidate_ids, dtype=np.intp, count=len(candidate_ids))
+        squared = (self.x[ids] - region.centroid_x) ** 2 + (self.y[ids] - region.centroid_y) ** 2
+        return int(ids[np.argmin(squared)])
+
+    def nearest(self, region: Region) -> Optional[int]:
+        """Return the id of the nearest live region other than ``region`` itself."""
+        self.alive[region.id] = False
+        try:
+            best = _argmin_squared_distance(self.x, self.y, region.centroid_x, region.centroid_y, self.alive)
+        finally:
+            self.alive[region.id] = True
+        return None if best < 0 else int(best)
+
+
+def pick_closest_neighbor(
+    region: Region, regions: Dict[int, Region], centroids: CentroidIndex
+) -> Optional[Region]:
     """Choose the neighboring region with the smallest centroid distance."""
-    valid_neighbors = [regions[nid] for nid in region.neighbors if nid in regions]
-    if not valid_neighbors:
+    neighbor_ids = [nid for nid in region.neighbors if nid in regions]
+    if not neighbor_ids:
         # Fallback: pick the overall closest region to ensure progress (for islands, etc.)
-        fallback_candidates = [
-            candidate for candidate in regions.values() if candidate.id != region.id
-        ]
-        if not fallback_candidates:
-            return None
-        return min(fallback_candidates, key=region.centroid_distance_to)
-    return min(valid_neighbors, key=region.centroid_distance_to)
+        closest_id = centroids.nearest(region)
+        return None if closest_id is None else regions[closest_id]
+    return regions[centroids.closest_among(region, neighbor_ids)]
 
 
-def perform_merges(regions: Dict[str, Region], threshold: int) -> Dict[str, Region]:
-    """Iteratively merge regions until all satisfy the population threshold."""
-    loop_guard = 0
-    while True:
-        under_threshold = [r for r in regions.values() if r.population < threshold]
-        if not under_threshold:
-            break
-        region = min(under_threshold, key=lambda r: r.population)
-        neighbor = pick_closest_neighbor(region, regions)
-        if neighbor is None:
-            raise MergeError(f"Region {region.id} has no available neighbors to merge with.")
+def _member_ids(region_id: int, municipality_ids: List[str], parent: Dict[int, int]) -> List[str]:
+    """Return the municipality ids merged into ``region_id``; a full scan, meant for diagnostics."""
+    return sorted(
+        municipality_id
+        for position, municipality_id in enumerate(municipality_ids)
+        if find_root(parent, position) == region_id
+    )
 
-        new_id = "+".join(sorted(region.members | neighbor.members))
-        merged = region.merge_with(neighbor, new_id)
 
-        # Update neighbor references
-        for neighbor_id in merged.neighbors:
-            if neighbor_id not in regions:
+def perform_merges(
+    regions: Dict[int, Region],
+    threshold: int,
+    municipality_ids: List[str],
+    parent: Optional[Dict[int, int]] = None,
+) -> Dict[int, Region]:
+    """Iteratively merge regions until all satisfy the population threshold.
+
+    Every merged-away region id is linked to its surviving root in ``parent``;
+    ``municipality_ids`` maps region ids back to IBGE codes for log and error messages.
+    """
+    if parent is None:
+        parent = {}
+    centroids = CentroidIndex(regions)
+    # Min-heap of (population, region_id); entries for merged-away regions are skipped lazily.
+    heap = [(r.population, r.id) for r in regions.values() if r.population < threshold]
+    heapq.heapify(heap)
+    loop_guard = 0
+    while heap:
+        population, region_id = heapq.heappop(heap)
+        region = regions.get(region_id)
+        if region is None or region.population != population:
+            continue
+        neighbor = pick_closest_neighbor(region, regions, centroids)
+        if neighbor is None:
+            members = "+".join(_member_ids(region.id, municipality_ids, parent))
+            raise MergeError(f"Region {members} has no available neighbors to merge with.")
+
+        # The merged region keeps the neighbor's id and reuses its neighbor set in place, so
+        # regions bordering the neighbor already point at the merged region; only the absorbed
+        # region's neighbors need their back-references rewritten.
+        merged_neighbors = neighbor.neighbors
+        merged_neighbors |= region.neighbors
+        merged_neighbors.discard(region.id)
+        merged_neighbors.discard(neighbor.id)
+        merged = region.merge_with(neighbor, neighbor.id, merged_neighbors)
+        parent[region.id] = merged.id
+
+        for neighbor_id in region.neighbors:
+            neighbor_region = regions.get(neighbor_id)
+            if neighbor_region is None or neighbor_id == neighbor.id:
                 continue
-            neighbor_region = regions[neighbor_id]
             neighbor_region.neighbors.discard(region.id)
-            neighbor_region.neighbors.discard(neighbor.id)
             neighbor_region.neighbors.add(merged.id)
 
         # Replace old regions with merged region
         del regions[region.id]
         del regions[neighbor.id]
         regions[merged.id] = merged
+        centroids.remove(region.id)
+        centroids.update(merged)
+        if merged.population < threshold:
+            heapq.heappush(heap, (merged.population, merged.id))
 
         loop_guard += 1
         if loop_guard % 100 == 0:
             logging.info(
-                "Merge step %d: merged %s and %s -> %s (population=%d)",
+                "Merge step %d: merged the region of %s into the region of %s (%s, population=%d)",
                 loop_guard,
-                region.id,
-                neighbor.id,
-                merged.id,
+                municipality_ids[region.id],
+                municipality_ids[merged.id],
+                merged.representative_name,
                 merged.population,
             )
 
@@ -211,17 +491,23 @@ def perform_merges(regions: Dict[str, Region], threshold: int) -> Dict[str, Regi
     return regions
 
 
-def regions_to_geodataframe(regions: Dict[str, Region]) -> gpd.GeoDataFrame:
+def regions_to_geodataframe(
+    regions: Dict[int, Region], municipality_ids: List[str], parent: Dict[int, int]
+) -> gpd.GeoDataFrame:
     """Convert the final regions to a GeoDataFrame in the desired output CRS."""
+    members: Dict[int, List[str]] = defaultdict(list)
+    for position, municipality_id in enumerate(municipality_ids):
+        members[find_root(parent, position)].append(municipality_id)
+
     records = []
     for region in regions.values():
         records.append(
             {
-                "region_id": region.id,
+                "region_id": "+".join(sorted(members[region.id])),
                 "population": region.population,
-                "member_count": len(region.members),
+                "member_count": len(members[region.id]),
                 "states": ",".join(sorted(region.states)),
-                "representative_name": max(region.names, key=len),
+                "representative_name": region.representative_name,
                 "geometry": region.geometry,
             }
         )
@@ -250,21 +536,73 @@ def generate_map(original: gpd.GeoDataFrame, merged: gpd.GeoDataFrame, output_pa
     logging.info("Saved comparison map to %s", output_path)
 
 
-def run_merge_pipeline(
-    threshold: int = MINIMUM_POPULATION_THRESHOLD, population_year: int = DEFAULT_POPULATION_YEAR
+def _results_dir(cache_dir: str, threshold: int, population_year: int) -> str:
+    return os.path.join(cache_dir, "results", _cache_key(threshold, population_year))
+
+
+def load_cached_results(
+    cache_dir: str, threshold: int, population_year: int
+) -> Optional[Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame, Dict[str, int]]]:
+    """Return previously stored pipeline results for the parameters, or None on a cache miss."""
+    results_dir = _results_dir(cache_dir, threshold, population_year)
+    stats_path = os.path.join(results_dir, "stats.json")
+    if not os.path.exists(stats_path):
+        return None
+    logging.info("Loading cached pipeline results from %s", results_dir)
+    original_gdf = gpd.read_parquet(os.path.join(results_dir, "original.parquet"))
+    merged_gdf = gpd.read_parquet(os.path.join(results_dir, "merged.parquet"))
+    with open(stats_path, "rb") as handle:
+        stats = orjson.loads(handle.read())
+    return original_gdf, merged_gdf, stats
+
+
+def store_cached_results(
+    cache_dir: str,
+    threshold: int,
+    population_year: int,
+    original_gdf: gpd.GeoDataFrame,
+    merged_gdf: gpd.GeoDataFrame,
+    stats: Dict[str, int],
+) -> None:
+    """Persist pipeline results so later runs with the same parameters can skip the pipeline."""
+    results_dir = _results_dir(cache_dir, threshold, population_year)
+    os.makedirs(os.path.dirname(results_dir), exist_ok=True)
+    # Write into a scratch directory first so readers never observe a partial entry.
+    staging_dir = tempfile.mkdtemp(dir=os.path.dirname(results_dir))
+    try:
+        original_gdf.to_parquet(os.path.join(staging_dir, "original.parquet"))
+        merged_gdf.to_parquet(os.path.join(staging_dir, "merged.parquet"))
+        with open(os.path.join(staging_dir, "stats.json"), "wb") as handle:
+            handle.write(orjson.dumps(stats))
+        shutil.rmtree(results_dir, ignore_errors=True)
+        os.replace(staging_dir, results_dir)
+    except OSError:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    logging.info("Stored pipeline results in %s", results_dir)
+
+
+def merge_geometries(
+    geographic: gpd.GeoDataFrame,
+    metric: gpd.GeoDataFrame,
+    population: Dict[str, int],
+    threshold: int,
+    population_year: int,
 ) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame, Dict[str, int]]:
-    """Execute the municipality merge pipeline and return GeoDataFrames plus summary stats."""
-    population = fetch_population(population_year)
-    geometries = fetch_geometries()
-    geometries["population"] = geometries["municipality_id"].map(population).fillna(0).astype(int)
-    adjacency = build_adjacency(geometries)
-    regions = initialize_regions(geometries, population, adjacency)
-    final_regions = perform_merges(regions, threshold=threshold)
-    merged_gdf = regions_to_geodataframe(final_regions)
-
-    original_gdf = geometries.to_crs(OUTPUT_CRS)[
-        ["municipality_id", "municipality_name", "state", "population", "geometry"]
-    ].copy()
+    """Run the CPU-bound part of the pipeline on already downloaded inputs.
+
+    ``geographic`` and ``metric`` hold the same municipalities in the output and calculation CRS.
+    """
+    adjacency = build_adjacency(metric)
+    regions = initialize_regions(metric, population, adjacency)
+    municipality_ids = metric["municipality_id"].tolist()
+    parent: Dict[int, int] = {}
+    final_regions = perform_merges(regions, threshold, municipality_ids, parent)
+    merged_gdf = regions_to_geodataframe(final_regions, municipality_ids, parent)
+
+    original_gdf = geographic.assign(
+        population=geographic["municipality_id"].map(population).fillna(0).astype(int)
+    )[["municipality_id", "municipality_name", "state", "population", "geometry"]]
 
     stats = {
         "threshold": int(threshold),
@@ -280,6 +618,44 @@ def run_merge_pipeline(
     return original_gdf, merged_gdf, stats
 
 
+async def run_merge_pipeline(
+    threshold: int = MINIMUM_POPULATION_THRESHOLD,
+    population_year: int = DEFAULT_POPULATION_YEAR,
+    cache_dir: Optional[str] = None,
+    refresh_cache: bool = False,
+    client: Optional[httpx.AsyncClient] = None,
+) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame, Dict[str, int]]:
+    """Execute the municipality merge pipeline and return GeoDataFrames plus summary stats.
+
+    When ``cache_dir`` is given, results, population data and geometries are reused from disk;
+    ``refresh_cache`` forces everything to be recomputed and the cache to be overwritten.
+    ``client`` is a shared HTTP client; a temporary one is created when omitted.
+    """
+    if cache_dir is not None and not refresh_cache:
+        cached = await asyncio.to_thread(load_cached_results, cache_dir, threshold, population_year)
+        if cached is not None:
+            return cached
+
+    async with contextlib.AsyncExitStack() as stack:
+        if client is None:
+            client = await stack.enter_async_context(create_http_client())
+        population, (geographic, metric) = await asyncio.gather(
+            load_population(population_year, client, cache_dir, refresh=refresh_cache),
+            load_geometries(cache_dir, refresh=refresh_cache),
+        )
+
+    original_gdf, merged_gdf, stats = await asyncio.to_thread(
+        merge_geometries, geographic, metric, population, threshold, population_year
+    )
+
+    if cache_dir is not None:
+        await asyncio.to_thread(
+            store_cached_results, cache_dir, threshold, population_year, original_gdf, merged_gdf, stats
+        )
+
+    return original_gdf, merged_gdf, stats
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Merge Brazilian municipalities under a population threshold.")
     parser.add_argument(
@@ -300,6 +676,12 @@ def parse_args() -> argparse.Namespace:
         default="output",
         help="Directory where artefacts (GeoJSON, map) will be stored (default: %(default)s).",
     )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Directory for the on-disk cache of downloads and results; disabled when omitted.",
+    )
     parser.add_argument(
         "--log-level",
         type=str,
@@ -314,8 +696,10 @@ def main() -> None:
     args = parse_args()
     logging.basicConfig(level=getattr(logging, args.log_level), format="%(levelname)s:%(message)s")
 
-    original_gdf, merged_gdf, _ = run_merge_pipeline(
-        threshold=args.threshold, population_year=args.population_year
+    original_gdf, merged_gdf, _ = asyncio.run(
+        run_merge_pipeline(
+            threshold=args.threshold, population_year=args.population_year, cache_dir=args.cache_dir
+        )
     )
 
     os.makedirs(args.output_dir, exist_ok=True)
@@ -0,0 +1,215 @@
+import asyncio
+import math
+
+import geopandas as gpd
+import numpy as np
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from shapely.geometry import MultiPolygon, Point, Polygon, box
+
+from generator import main
+
+
+def _assert_json_close(actual, expected) -> None:
+    """Compare decoded JSON, allowing floats (coordinates) to differ in the last digits."""
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and actual.keys() == expected.keys()
+        for key in expected:
+            _assert_json_close(actual[key], expected[key])
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(actual) == len(expected)
+        for actual_item, expected_item in zip(actual, expected):
+            _assert_json_close(actual_item, expected_item)
+    elif isinstance(expected, float):
+        assert math.isclose(actual, expected, rel_tol=1e-12, abs_tol=1e-12)
+    else:
+        assert actual == expected
+
+
+def _layer() -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        {
+            "region_id": ["1+2", "3", "4"],
+            "population": np.array([30_000, 12, 45_001], dtype="int64"),
+            "density": [0.1, np.nan, 2 / 3],
+        },
+        geometry=[
+            Polygon([(-46.6, -23.5), (-46.5, -23.5), (-46.55, -23.45)]),
+            None,
+            MultiPolygon([box(0, 0, 1, 1), box(2, 2, 3, 3)]),
+        ],
+        index=[10, 20, 30],
+        crs="EPSG:4674",
+    )
+
+
+def test_serialize_layer_matches_geopandas_to_json():
+    gdf = _layer()
+    collection, ndjson = main._serialize_layer(gdf)
+
+    decoded = orjson.loads(collection.content)
+    _assert_json_close(decoded, orjson.loads(gdf.to_json()))
+    assert [feature["id"] for feature in decoded["features"]] == ["10", "20", "30"]
+    assert decoded["features"][1]["geometry"] is None
+    assert decoded["features"][1]["properties"]["density"] is None
+
+    lines = ndjson.content.splitlines()
+    assert ndjson.content.endswith(b"\n")
+    assert [orjson.loads(line) for line in lines] == decoded["features"]
+
+
+def test_serialize_layer_handles_points_and_empty_frames():
+    points = gpd.GeoDataFrame({"name": ["Sé"]}, geometry=[Point(-46.633308, -23.55052)], crs="EPSG:4674")
+    collection, _ = main._serialize_layer(points)
+    _assert_json_close(orjson.loads(collection.content), orjson.loads(points.to_json()))
+
+    empty = points.iloc[:0]
+    collection, ndjson = main._serialize_layer(empty)
+    assert orjson.loads(collection.content) == orjson.loads(empty.to_json())
+    assert ndjson.content == b""
+
+
+STATS = {"threshold": 30_000, "population_year": 2021, "original_count": 3, "merged_count": 2}
+
+
+@pytest.fixture
+def ready_cache(monkeypatch):
+    """Install a PipelineCache filled from a stubbed pipeline run at the default parameters."""
+
+    async def fake_pipeline(threshold, population_year, **kwargs):
+        return _layer(), _layer().iloc[:2], {**STATS, "threshold": threshold}
+
+    monkeypatch.setattr(main, "run_merge_pipeline", fake_pipeline)
+    monkeypatch.setattr(main, "create_http_client", lambda: None)
+    cache = main.PipelineCache()
+    asyncio.run(cache.refresh(main.MINIMUM_POPULATION_THRESHOLD, main.DEFAULT_POPULATION_YEAR))
+    monkeypatch.setattr(main, "pipeline_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def client():
+    # Not used as a context manager, so the startup hook never runs the real pipeline.
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize(
+    ("path", "getter"),
+    [("/geojson/merged", "get_merged_geojson"), ("/geojson/merged.ndjson", "get_merged_ndjson")],
+)
+def test_gzip_negotiation(ready_cache, client, path, getter):
+    payload = getattr(ready_cache, getter)()
+
+    compressed = client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert compressed.status_code == 200
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["etag"] == payload.gzip_etag
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.content == payload.content
+
+    identity_requests = [{"Accept-Encoding": "gzip;q=0"}, {"Accept-Encoding": "identity"}, {}]
+    # httpx sends "Accept-Encoding: gzip, deflate" unless the client default is removed.
+    del client.headers["Accept-Encoding"]
+    for headers in identity_requests:
+        identity = client.get(path, headers=headers)
+        assert identity.status_code == 200
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["etag"] == payload.etag
+        assert identity.headers["vary"] == "Accept-Encoding"
+        assert identity.content == payload.content
+
+
+@pytest.mark.parametrize(
+    ("path", "getter"),
+    [("/geojson/original", "get_original_geojson"), ("/geojson/original.ndjson", "get_original_ndjson")],
+)
+def test_if_none_match_is_checked_against_the_negotiated_representation(ready_cache, client, path, getter):
+    payload = getattr(ready_cache, getter)()
+
+    not_modified = client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": payload.gzip_etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == payload.gzip_etag
+    assert not_modified.headers["vary"] == "Accept-Encoding"
+
+    # The identity ETag does not validate the gzip representation, and vice versa.
+    stale = client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": payload.etag})
+    assert stale.status_code == 200
+    assert stale.headers["etag"] == payload.gzip_etag
+    stale = client.get(path, headers={"Accept-Encoding": "identity", "If-None-Match": payload.gzip_etag})
+    assert stale.status_code == 200
+    assert stale.headers["etag"] == payload.etag
+
+    headers = {"Accept-Encoding": "identity", "If-None-Match": f'"other", {payload.etag}'}
+    listed = client.get(path, headers=headers)
+    assert listed.status_code == 304
+    assert listed.headers["vary"] == "Accept-Encoding"
+
+
+DATA_PATHS = ["/geojson/original", "/geojson/merged", "/geojson/original.ndjson", "/geojson/merged.ndjson"]
+
+
+@pytest.mark.parametrize("path", ["/status", *DATA_PATHS])
+def test_get_endpoints_return_503_before_the_first_run(monkeypatch, client, path):
+    monkeypatch.setattr(main, "pipeline_cache", main.PipelineCache())
+    response = client.get(path)
+    assert response.status_code == 503
+
+
+@pytest.mark.parametrize("path", DATA_PATHS)
+@pytest.mark.parametrize(
+    "params",
+    [{"threshold": 50_000}, {"population_year": 2020}, {"threshold": 50_000, "population_year": 2021}],
+)
+def test_get_endpoints_return_409_for_other_parameters(ready_cache, client, path, params):
+    response = client.get(path, params=params)
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize("path", DATA_PATHS)
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"threshold": main.MINIMUM_POPULATION_THRESHOLD},
+        {"threshold": main.MINIMUM_POPULATION_THRESHOLD, "population_year": main.DEFAULT_POPULATION_YEAR},
+    ],
+)
+def test_get_endpoints_serve_the_cached_scenario(ready_cache, client, path, params):
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    assert response.content
+
+
+def test_get_endpoints_still_validate_parameters(ready_cache, client):
+    assert client.get("/geojson/merged", params={"threshold": 0}).status_code == 400
+    assert client.get("/geojson/merged", params={"population_year": 1999}).status_code == 400
+
+
+def test_status_reports_the_cached_scenario(ready_cache, client):
+    response = client.get("/status")
+    assert response.status_code == 200
+    assert response.json()["cache_threshold"] == main.MINIMUM_POPULATION_THRESHOLD
+    assert response.json()["cache_population_year"] == main.DEFAULT_POPULATION_YEAR
+
+
+def test_refresh_switches_the_cached_scenario(ready_cache, client):
+    response = client.post("/refresh", params={"threshold": 50_000})
+    assert response.status_code == 200
+    assert response.json()["cache_threshold"] == 50_000
+
+    assert client.get("/geojson/merged.ndjson", params={"threshold": 50_000}).status_code == 200
+    assert client.get("/geojson/merged.ndjson").status_code == 200
+    assert client.get("/geojson/merged.ndjson", params={"threshold": 30_000}).status_code == 409
+
+
+def test_iter_chunks_is_an_async_generator_covering_the_body():
+    content = bytes(range(256)) * (3 * main.STREAM_CHUNK_SIZE // 256) + b"tail"
+
+    async def collect():
+        return [bytes(chunk) async for chunk in main._iter_chunks(content)]
+
+    chunks = asyncio.run(collect())
+    assert [len(chunk) for chunk in chunks] == [main.STREAM_CHUNK_SIZE] * 3 + [4]
+    assert b"".join(chunks) == content
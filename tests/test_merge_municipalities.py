@@ -0,0 +1,208 @@
+import asyncio
+import importlib
+from typing import Dict, List
+
+import geopandas as gpd
+import httpx
+import orjson
+import pytest
+from geopandas.testing import assert_geodataframe_equal
+from shapely.geometry import Polygon, box
+
+from src import merge_municipalities as mm
+
+
+def _frame(rows: List[tuple]) -> gpd.GeoDataFrame:
+    """Build a municipality frame in the calculation CRS from (id, name, state, geometry) rows."""
+    ids, names, states, geometries = zip(*rows)
+    return gpd.GeoDataFrame(
+        {"municipality_id": list(ids), "municipality_name": list(names), "state": list(states)},
+        geometry=list(geometries),
+        crs=mm.CALCULATION_CRS,
+    )
+
+
+def _synthetic_frame() -> gpd.GeoDataFrame:
+    """Three municipalities in a row plus an isolated island."""
+    return _frame(
+        [
+            ("1", "Alfa", "AA", box(0, 0, 1, 1)),
+            ("2", "Beta", "AA", box(1, 0, 2, 1)),
+            ("3", "Gama Grande", "BB", box(2, 0, 4, 1)),
+            ("5", "Ilha", "BB", box(10, 0, 11, 1)),
+        ]
+    )
+
+
+POPULATION = {"1": 10, "2": 20, "3": 100, "5": 5}
+
+
+def _run_merges(gdf: gpd.GeoDataFrame, population: Dict[str, int], threshold: int) -> gpd.GeoDataFrame:
+    adjacency = mm.build_adjacency(gdf)
+    regions = mm.initialize_regions(gdf, population, adjacency)
+    municipality_ids = gdf["municipality_id"].tolist()
+    parent: Dict[int, int] = {}
+    final_regions = mm.perform_merges(regions, threshold, municipality_ids, parent)
+    return mm.regions_to_geodataframe(final_regions, municipality_ids, parent)
+
+
+def test_modules_import():
+    assert callable(mm.run_merge_pipeline)
+    generator = importlib.import_module("generator.main")
+    assert generator.app is not None
+
+
+def test_build_adjacency_links_touching_polygons():
+    adjacency = mm.build_adjacency(_synthetic_frame())
+    assert adjacency == {"1": {"2"}, "2": {"1", "3"}, "3": {"2"}, "5": set()}
+
+
+def test_perform_merges_reaches_threshold():
+    merged = _run_merges(_synthetic_frame(), POPULATION, threshold=25)
+    merged = merged.sort_values("region_id").reset_index(drop=True)
+
+    assert merged["region_id"].tolist() == ["1+2", "3+5"]
+    assert merged["population"].tolist() == [30, 105]
+    assert merged["member_count"].tolist() == [2, 2]
+    assert merged["representative_name"].tolist() == ["Alfa", "Gama Grande"]
+    assert merged["states"].tolist() == ["AA", "BB"]
+    assert (merged["population"] >= 25).all()
+
+
+def test_perform_merges_leaves_regions_above_threshold_untouched():
+    merged = _run_merges(_synthetic_frame(), POPULATION, threshold=1)
+    assert sorted(merged["region_id"]) == ["1", "2", "3", "5"]
+
+
+def test_perform_merges_follows_global_heap_order():
+    # Two mainland components plus an island sitting just above municipality 3. The island is
+    # popped before 3 and merges with it while 3 is still on its own; solving each mainland
+    # component first would instead fold 3 into 1+2 and the island after it.
+    gdf = _frame(
+        [
+            ("1", "Alfa", "AA", box(0, 0, 1, 1)),
+            ("2", "Beta", "AA", box(1, 0, 3, 1)),
+            ("3", "Gama", "AA", box(3, 0, 4, 1)),
+            ("4", "Delta", "BB", box(20, 0, 21, 1)),
+            ("5", "Epsilon", "BB", box(21, 0, 22, 1)),
+            ("6", "Ilha", "AA", box(3, 2, 4, 3)),
+        ]
+    )
+    population = {"1": 10, "2": 100, "3": 20, "4": 10, "5": 20, "6": 12}
+
+    merged = _run_merges(gdf, population, threshold=30)
+
+    assert sorted(merged["region_id"]) == ["1+2", "3+6", "4+5"]
+    assert sorted(merged["population"]) == [30, 32, 110]
+
+
+def test_centroid_index_nearest_skips_itself_and_removed_regions():
+    gdf = _synthetic_frame()
+    regions = mm.initialize_regions(gdf, POPULATION, mm.build_adjacency(gdf))
+    index = mm.CentroidIndex(regions)
+    island = regions[3]
+
+    assert index.nearest(island) == 2
+    index.remove(2)
+    assert index.nearest(island) == 1
+    assert index.alive[island.id]
+
+
+def test_cached_results_round_trip(tmp_path):
+    original = gpd.GeoDataFrame(
+        {"municipality_id": ["1", "2"], "municipality_name": ["Alfa", "Beta"], "population": [10, 20]},
+        geometry=[box(-47, -23, -46, -22), box(-46, -23, -45, -22)],
+        crs=mm.OUTPUT_CRS,
+    )
+    merged = gpd.GeoDataFrame(
+        {"region_id": ["1+2"], "population": [30], "member_count": [2]},
+        geometry=[box(-47, -23, -45, -22)],
+        crs=mm.OUTPUT_CRS,
+    )
+    stats = {"threshold": 25, "population_year": 2021, "original_count": 2, "merged_count": 1}
+    cache_dir = str(tmp_path)
+
+    assert mm.load_cached_results(cache_dir, 25, 2021) is None
+    mm.store_cached_results(cache_dir, 25, 2021, original, merged, stats)
+
+    cached_original, cached_merged, cached_stats = mm.load_cached_results(cache_dir, 25, 2021)
+    assert_geodataframe_equal(cached_original, original)
+    assert_geodataframe_equal(cached_merged, merged)
+    assert cached_stats == stats
+    assert mm.load_cached_results(cache_dir, 30, 2021) is None
+    assert mm.load_cached_results(cache_dir, 25, 2020) is None
+
+
+def test_write_parquet_atomically_removes_its_temporary_file(tmp_path, monkeypatch):
+    def failing_to_parquet(self, path, *args, **kwargs):
+        with open(path, "wb") as handle:
+            handle.write(b"partial")
+        raise ValueError("simulated pyarrow failure")
+
+    monkeypatch.setattr(gpd.GeoDataFrame, "to_parquet", failing_to_parquet)
+    target = tmp_path / "geometries" / "metric.parquet"
+
+    with pytest.raises(ValueError):
+        mm._write_parquet_atomically(_synthetic_frame(), str(target))
+    assert list(target.parent.iterdir()) == []
+
+
+def _region(region_id: int, geometry) -> mm.Region:
+    return mm.Region(
+        id=region_id,
+        population=10,
+        geometry=geometry,
+        representative_name=f"R{region_id}",
+        states={"AA"},
+        area=geometry.area,
+        centroid_x=geometry.centroid.x,
+        centroid_y=geometry.centroid.y,
+    )
+
+
+def test_merge_with_repairs_inputs_that_break_coverage_union():
+    bowtie = Polygon([(0, 0), (2, 2), (2, 0), (0, 2), (0, 0)])
+    merged = _region(0, bowtie).merge_with(_region(1, box(2, 0, 3, 2)), 1, set())
+
+    assert merged.geometry.is_valid
+    assert merged.geometry.geom_type in ("Polygon", "MultiPolygon")
+    assert merged.geometry.area == pytest.approx(4.0)
+
+
+def test_merge_error_names_the_stuck_municipalities():
+    gdf = _frame(
+        [
+            ("3550308", "São Paulo", "SP", box(0, 0, 1, 1)),
+            ("3509502", "Campinas", "SP", box(1, 0, 2, 1)),
+        ]
+    )
+    population = {"3550308": 5, "3509502": 5}
+
+    with pytest.raises(mm.MergeError, match=r"^Region 3509502\+3550308 has no available neighbors"):
+        _run_merges(gdf, population, threshold=30)
+
+
+def test_load_population_revalidates_the_disk_cache_with_last_modified(tmp_path):
+    stamp = "Wed, 01 May 2024 12:00:00 GMT"
+    body = orjson.dumps([{"resultados": [{"series": [{"localidade": {"id": "1"}, "serie": {"2021": "10"}}]}]}])
+    seen = []
+
+    def ibge(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.headers.get("If-Modified-Since") == stamp:
+            return httpx.Response(304)
+        return httpx.Response(200, content=body, headers={"Last-Modified": stamp})
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(ibge)) as client:
+            first = await mm.load_population(2021, client, str(tmp_path))
+            cached = await mm.load_population(2021, client, str(tmp_path))
+            refreshed = await mm.load_population(2021, client, str(tmp_path), refresh=True)
+        return first, cached, refreshed
+
+    first, cached, refreshed = asyncio.run(scenario())
+
+    assert first == cached == refreshed == {"1": 10}
+    assert len(seen) == 2
+    assert "If-Modified-Since" not in seen[0].headers
+    assert seen[1].headers["If-Modified-Since"] == stamp